@@ -2,9 +2,67 @@
 computations.py - Computational functions for portfolio analysis
 """
 
-import statistics
+import functools
+import math
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
 import yfinance as yf
-from models import portfolio, RISK_WEIGHT, normalize_ticker
+from models import portfolio, Portfolio, RISK_WEIGHT, normalize_ticker, SUCCESS, WARNING, RESET
+
+
+def lazy_njit(**options):
+    """
+    numba.njit(**options), applied on the kernel's first call instead of at import
+    numba is optional and costs a noticeable share of startup, so importing this
+    module never loads it; without numba the kernel runs as plain Python
+    """
+    def decorate(func):
+        compiled = None
+        
+        @functools.wraps(func)
+        def wrapper(*args):
+            nonlocal compiled
+            if compiled is None:
+                try:
+                    from numba import njit
+                    compiled = njit(**options)(func)
+                except ImportError:
+                    compiled = func
+            return compiled(*args)
+        return wrapper
+    return decorate
+
+
+# Yahoo accepts a limited number of symbols per download request
+BATCH_SIZE = 20
+
+# Threads used for single-ticker fallback fetches (network bound)
+MAX_WORKERS = 16
+
+# On-disk cache of downloaded history. Live quotes expire after a few minutes;
+# longer windows (past daily bars don't change) are reused for the rest of the day.
+CACHE_DIR = os.path.expanduser("~/.portt_yf_cache")
+LIVE_PRICE_TTL = 5 * 60      # seconds, for period="1d"
+
+_print_lock = threading.Lock()
+
+# Per-asset status lines, colored once here and %-formatted in the update loop
+_UPDATED_FMT = f"{SUCCESS}✓ Updated %s → $%.2f{RESET}"
+_NOT_FETCHED_FMT = f"{WARNING}⚠️  Could not fetch price for %s{RESET}"
+
+
+def _safe_print(message):
+    """Print from worker threads without interleaving lines"""
+    with _print_lock:
+        print(message)
 
 
 def percent_return(item):
@@ -29,28 +87,80 @@ def volatility(ticker, days=60):
     Calculate annualized volatility for a ticker
     Returns None if insufficient data
     """
-    ticker = normalize_ticker(ticker)
+    symbol = normalize_ticker(ticker)
     try:
-        data = yf.Ticker(ticker).history(period=f"{days}d")
-        
-        if len(data) < 2:
-            return None
-        
-        returns = data["Close"].pct_change().dropna()
-        vol = returns.std() * (252 ** 0.5)  # annualized volatility
-        return vol
+        return _cached_volatility(symbol, days)
     except Exception as e:
-        print(f"⚠️  Error calculating volatility for {ticker}: {e}")
+        print(f"⚠️  Error calculating volatility for {symbol}: {e}")
+        return None
+
+
+@functools.lru_cache(maxsize=512)
+def _cached_volatility(ticker, days):
+    """
+    Volatility keyed by normalized ticker so each symbol is fetched once
+    Errors propagate, so lru_cache only keeps successful results
+    """
+    data = _ticker_history(ticker, f"{days}d")
+    return _annualized_volatility(data["Close"])
+
+
+@lazy_njit(cache=True, fastmath=True)
+def _annualized_vol(close):
+    """
+    Sample std of daily simple returns * sqrt(252), in one Welford pass.
+    Zero prices are skipped instead of divided by; NaN if fewer than 2 returns.
+    """
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    for i in range(close.shape[0] - 1):
+        prev = close[i]
+        if prev == 0.0:
+            continue
+        r = (close[i + 1] - prev) / prev
+        count += 1
+        delta = r - mean
+        mean += delta / count
+        m2 += delta * (r - mean)
+    
+    if count < 2:
+        return np.nan
+    return math.sqrt(m2 / (count - 1)) * math.sqrt(252.0)
+
+
+def _annualized_volatility(close):
+    """Annualized volatility of a close price series, None if too short"""
+    vol = _annualized_vol(close.dropna().to_numpy(dtype=float))
+    if math.isnan(vol):
         return None
+    return float(vol)
+
+
+def precompute_volatilities(tickers, days=60):
+    """
+    Calculate volatility for many tickers from one batched history download
+    Returns dict mapping normalized ticker -> volatility (None if insufficient data)
+    """
+    histories = fetch_history(tickers, period=f"{days}d")
+    return {
+        symbol: _annualized_volatility(hist["Close"])
+        for symbol, hist in histories.items()
+    }
 
 
-def classify_risk(item):
+def classify_risk(item, vol_map=None):
     """
     Classify risk level based on volatility
+    vol_map: optional result of precompute_volatilities, looked up before fetching
     Returns: "HIGH", "OPTIMAL", or "LOW"
     """
     ticker = item["ticker"]
-    vol = volatility(ticker)
+    symbol = normalize_ticker(ticker)
+    if vol_map is not None and symbol in vol_map:
+        vol = vol_map[symbol]
+    else:
+        vol = volatility(ticker)
 
     if vol is None:
         return "UNKNOWN"
@@ -63,9 +173,9 @@ def classify_risk(item):
         return "LOW"
 
 
-def risk_score(item):
+def risk_score(item, vol_map=None):
     """Get numeric risk score for sorting"""
-    level = classify_risk(item)
+    level = classify_risk(item, vol_map)
     return RISK_WEIGHT.get(level, 2)
 
 
@@ -77,104 +187,323 @@ def get_live_price(ticker):
     """
     ticker = normalize_ticker(ticker)
     try:
-        data = yf.Ticker(ticker)
-        hist = data.history(period="1d")
+        hist = _ticker_history(ticker, "1d")
         
         if hist.empty:
-            print(f"⚠️  No price data found for {ticker}")
+            _safe_print(f"⚠️  No price data found for {ticker}")
             return None
         
         price = float(hist["Close"].iloc[-1])
         
         # Sanity check: validate price is reasonable
         if price <= 0:
-            print(f"⚠️  Invalid price {price} for {ticker}")
+            _safe_print(f"⚠️  Invalid price {price} for {ticker}")
             return None
         
         return price
     except Exception as e:
-        print(f"❌ Error fetching price for {ticker}: {e}")
+        _safe_print(f"❌ Error fetching price for {ticker}: {e}")
         return None
 
 
+def _cache_path(symbol, period, interval):
+    """Location of the cached history for one ticker/period/interval"""
+    name = f"{symbol}_{period}_{interval}".replace(os.sep, "_")
+    return os.path.join(CACHE_DIR, f"{name}.pkl")
+
+
+def _is_fresh(mtime, period):
+    """Whether a cache entry written at mtime is still valid for period"""
+    if period == "1d":
+        return time.time() - mtime <= LIVE_PRICE_TTL
+    return date.fromtimestamp(mtime) == date.today()
+
+
+def _load_cached_history(symbol, period, interval="1d"):
+    """Return cached history if present and still fresh, else None"""
+    path = _cache_path(symbol, period, interval)
+    try:
+        if not _is_fresh(os.path.getmtime(path), period):
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        return None
+
+
+def _store_cached_history(symbol, period, interval, hist):
+    """Write history to the cache atomically; caching is best-effort"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(hist, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, _cache_path(symbol, period, interval))
+    except Exception:
+        pass
+
+
+def _ticker_history(symbol, period):
+    """Single-ticker history through the on-disk cache"""
+    hist = _load_cached_history(symbol, period)
+    if hist is None:
+        hist = yf.Ticker(symbol).history(period=period)
+        if not hist.empty:
+            _store_cached_history(symbol, period, "1d", hist)
+    return hist
+
+
+def fetch_history(tickers, period="1d", interval="1d"):
+    """
+    Download price history for many tickers using batched requests.
+    Fresh entries from the on-disk cache are reused instead of downloaded.
+    Returns dict mapping normalized ticker -> DataFrame (tickers without data are omitted)
+    """
+    histories = {}
+    symbols = []
+    for symbol in dict.fromkeys(normalize_ticker(t) for t in tickers):
+        cached = _load_cached_history(symbol, period, interval)
+        if cached is not None:
+            histories[symbol] = cached
+        else:
+            symbols.append(symbol)
+    
+    for start in range(0, len(symbols), BATCH_SIZE):
+        chunk = symbols[start:start + BATCH_SIZE]
+        try:
+            data = yf.download(
+                chunk, period=period, interval=interval, group_by="ticker",
+                threads=True, progress=False, auto_adjust=True
+            )
+        except Exception as e:
+            print(f"⚠️  Batch download failed for {', '.join(chunk)}: {e}")
+            continue
+        
+        if data is None or data.empty:
+            continue
+        
+        available = set(data.columns.get_level_values(0))
+        for symbol in chunk:
+            if symbol not in available:
+                continue
+            hist = data[symbol].dropna(how="all")
+            if not hist.empty:
+                histories[symbol] = hist
+                _store_cached_history(symbol, period, interval, hist)
+    
+    return histories
+
+
 def update_all_current_prices(portfolio_list=None):
     """
     Update current prices for all assets in portfolio
+    Prices are fetched in batches; tickers the batch missed are retried
+    concurrently through get_live_price
+    Returns (changed, fetched): whether any asset's price changed, and how
+    many assets got a live price
     """
     if portfolio_list is None:
         portfolio_list = portfolio
     
     print("⏳ Updating live prices...")
     
+    histories = fetch_history([asset["ticker"] for asset in portfolio_list], period="1d")
+    prices = {symbol: float(hist["Close"].iloc[-1]) for symbol, hist in histories.items()}
+    
+    missing = [
+        symbol for symbol in dict.fromkeys(normalize_ticker(a["ticker"]) for a in portfolio_list)
+        if not prices.get(symbol, 0) > 0
+    ]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(missing))) as executor:
+            futures = {executor.submit(get_live_price, symbol): symbol for symbol in missing}
+            for future in as_completed(futures):
+                prices[futures[future]] = future.result()
+    
+    # Collect the report and write it in one go instead of one print per asset
+    lines = []
+    changed = False
+    fetched = 0
     for asset in portfolio_list:
         ticker = asset["ticker"]
-        new_price = get_live_price(ticker)
+        new_price = prices.get(normalize_ticker(ticker))
         
         if new_price is not None:
-            asset["current_price"] = round(new_price, 2)
-            print(f"✓ Updated {ticker} → ${new_price:.2f}")
+            rounded = round(new_price, 2)
+            changed = changed or asset["current_price"] != rounded
+            asset["current_price"] = rounded
+            fetched += 1
+            lines.append(_UPDATED_FMT % (ticker, new_price))
         else:
-            print(f"⚠️  Could not fetch price for {ticker}")
+            lines.append(_NOT_FETCHED_FMT % ticker)
+    
+    lines.append("🔄 Live prices updated!\n")
+    with _print_lock:
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
     
-    print("🔄 Live prices updated!\n")
+    return changed, fetched
 
 
-def recalculate_portfolio(portfolio_list=None, preferences=None):
+def percent_returns(pf):
+    """Vectorized percent_return over a Portfolio (0 where buy price is 0)"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(pf.buy_price == 0, 0.0, (pf.current_price - pf.buy_price) / pf.buy_price * 100)
+
+
+def market_values(pf):
+    """Vectorized market_value over a Portfolio"""
+    return pf.quantity * pf.current_price
+
+
+def unrealized_pls(pf):
+    """Vectorized unrealized_pl over a Portfolio"""
+    return (pf.current_price - pf.buy_price) * pf.quantity
+
+
+@lazy_njit(cache=True)
+def _agg_loop(quantity, buy_price, current_price):
+    """Total unrealized P&L and mean percent return, fused into one pass"""
+    n = quantity.shape[0]
+    pl_sum = 0.0
+    ret_sum = 0.0
+    for i in range(n):
+        diff = current_price[i] - buy_price[i]
+        pl_sum += diff * quantity[i]
+        if buy_price[i] != 0.0:  # percent_return treats a zero buy price as 0%
+            ret_sum += diff / buy_price[i] * 100
+    
+    if n == 0:
+        return pl_sum, 0.0
+    return pl_sum, ret_sum / n
+
+
+def summarize_returns(portfolio_list=None):
     """
-    Recalculate all portfolio metrics
-    Returns dictionary with computed values
+    Total unrealized P&L and average percent return across the portfolio
+    Returns (total_pl, avg_return)
     """
     if portfolio_list is None:
         portfolio_list = portfolio
     
-    if preferences is None:
-        preferences = {"order": "HtoLrisk"}
+    pf = Portfolio.from_dicts(portfolio_list)
+    total_pl, avg_return = _agg_loop(pf.quantity, pf.buy_price, pf.current_price)
+    return float(total_pl), float(avg_return)
+
+
+class PortfolioMetrics:
+    """
+    Portfolio metrics computed on first access.
+    Totals are ready immediately; sorted views (risk needs volatility downloads)
+    are only built when a caller asks for them. Supports dict-style get() / [].
+    """
+    FIELDS = (
+        "total_value", "sorted_by_return", "sorted_by_risk", "sorted_by_pnl",
+        "top_3_best", "best_ass", "worst", "worst_ass", "unrealised_pnl"
+    )
     
-    # Calculate totals
-    total_value = sum([market_value(i) for i in portfolio_list])
+    def __init__(self, portfolio_list, preferences, pf, returns):
+        # Snapshot the list so later appends/removes don't shift the indices below
+        self._assets = list(portfolio_list)
+        self._preferences = preferences
+        self._pf = pf
+        self._returns = returns
+        self.total_value = float(market_values(pf).sum())
     
-    # Sort by various metrics
-    sorted_by_return = sorted(portfolio_list, key=percent_return, reverse=True)
-    sorted_by_pnl = sorted(portfolio_list, key=lambda x: unrealized_pl(x), reverse=True)
+    def get(self, name, default=None):
+        if name not in self.FIELDS:
+            return default
+        return getattr(self, name)
     
-    # Sort by risk preference
-    if preferences.get("order") == "HtoLrisk":
-        sorted_by_risk = sorted(portfolio_list, key=risk_score, reverse=True)
-    else:
-        sorted_by_risk = sorted(portfolio_list, key=risk_score, reverse=False)
+    def __getitem__(self, name):
+        if name not in self.FIELDS:
+            raise KeyError(name)
+        return getattr(self, name)
     
-    # Get top 3 and worst
-    top_3_best = sorted_by_return[0:3] if len(sorted_by_return) >= 3 else sorted_by_return
+    @functools.cached_property
+    def _pnls(self):
+        return unrealized_pls(self._pf)
     
-    best_ass = [
-        [item["ticker"], f"{item['buy_price']:.2f}", f"{item['current_price']:.2f}"]
-        for item in top_3_best
-    ]
+    # Sort by various metrics (stable, so ties keep portfolio order like sorted() did)
+    @functools.cached_property
+    def _by_return(self):
+        return np.argsort(-self._returns, kind="stable")
     
-    worst = sorted_by_return[-1] if sorted_by_return else None
-    worst_ass = [worst["ticker"], f"{worst['buy_price']:.2f}", f"{worst['current_price']:.2f}"] if worst else []
+    @functools.cached_property
+    def _by_pnl(self):
+        return np.argsort(-self._pnls, kind="stable")
     
-    # Unrealized P&L per asset
-    unrealised_pnl = [(item["ticker"], unrealized_pl(item)) for item in sorted_by_pnl]
+    @functools.cached_property
+    def sorted_by_return(self):
+        return [self._assets[i] for i in self._by_return]
     
-    # Add status to each asset
-    for asset in portfolio_list:
-        if percent_return(asset) > 0:
-            asset["status"] = "profit"
+    @functools.cached_property
+    def sorted_by_pnl(self):
+        return [self._assets[i] for i in self._by_pnl]
+    
+    @functools.cached_property
+    def sorted_by_risk(self):
+        vol_map = precompute_volatilities(self._pf.symbols)
+        risks = np.array([risk_score(item, vol_map) for item in self._assets], dtype=float)
+        
+        # Sort by risk preference
+        if self._preferences.get("order") == "HtoLrisk":
+            by_risk = np.argsort(-risks, kind="stable")
         else:
-            asset["status"] = "loss"
+            by_risk = np.argsort(risks, kind="stable")
+        return [self._assets[i] for i in by_risk]
     
-    return {
-        "total_value": total_value,
-        "sorted_by_return": sorted_by_return,
-        "sorted_by_risk": sorted_by_risk,
-        "sorted_by_pnl": sorted_by_pnl,
-        "top_3_best": top_3_best,
-        "best_ass": best_ass,
-        "worst": worst,
-        "worst_ass": worst_ass,
-        "unrealised_pnl": unrealised_pnl
-    }
+    @functools.cached_property
+    def top_3_best(self):
+        return self.sorted_by_return[0:3]
+    
+    @functools.cached_property
+    def best_ass(self):
+        pf = self._pf
+        return [
+            [pf.tickers[i], f"{pf.buy_price[i]:.2f}", f"{pf.current_price[i]:.2f}"]
+            for i in self._by_return[0:3]
+        ]
+    
+    @functools.cached_property
+    def worst(self):
+        return self.sorted_by_return[-1] if self._assets else None
+    
+    @functools.cached_property
+    def worst_ass(self):
+        if not self._assets:
+            return []
+        pf = self._pf
+        i = self._by_return[-1]
+        return [pf.tickers[i], f"{pf.buy_price[i]:.2f}", f"{pf.current_price[i]:.2f}"]
+    
+    @functools.cached_property
+    def unrealised_pnl(self):
+        """Unrealized P&L per asset, highest first"""
+        return [(self._pf.tickers[i], float(self._pnls[i])) for i in self._by_pnl]
+
+
+def recalculate_portfolio(portfolio_list=None, preferences=None):
+    """
+    Recalculate all portfolio metrics
+    Returns PortfolioMetrics (dict-style access; sorted views are computed lazily)
+    """
+    if portfolio_list is None:
+        portfolio_list = portfolio
+    
+    if preferences is None:
+        preferences = {"order": "HtoLrisk"}
+    
+    # Vectorized metrics over the whole portfolio (same formulas as the per-asset helpers)
+    pf = Portfolio.from_dicts(portfolio_list)
+    returns = percent_returns(pf)
+    
+    # Add status to each asset (tolist() keeps plain str values for JSON state)
+    statuses = np.where(returns > 0, "profit", "loss").tolist()
+    for asset, status in zip(portfolio_list, statuses):
+        asset["status"] = status
+    
+    return PortfolioMetrics(portfolio_list, preferences, pf, returns)
 
 
 def get_portfolio_claim(ventures, portfolio_list=None):
@@ -188,14 +517,20 @@ def get_portfolio_claim(ventures, portfolio_list=None):
     high_count = 0
     low_count = 0
     
-    for venture in ventures:
-        for asset in portfolio_list:
-            if asset["ticker"] == venture["ticker"]:
-                if asset["risk"].upper() == "HIGH":
-                    high_count += 1
-                elif asset["risk"].upper() == "LOW":
-                    low_count += 1
-                break
+    # Count ventures per ticker, then walk the portfolio once. pop() keeps the
+    # first-match semantics and lets the walk stop once every ticker is matched.
+    pending = Counter(venture["ticker"] for venture in ventures)
+    for asset in portfolio_list:
+        if not pending:
+            break
+        matched = pending.pop(asset["ticker"], 0)
+        if not matched:
+            continue
+        risk = asset["risk"].upper()
+        if risk == "HIGH":
+            high_count += matched
+        elif risk == "LOW":
+            low_count += matched
     
     if high_count > low_count:
         return "daring"
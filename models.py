@@ -2,6 +2,11 @@
 models.py - Data structures, constants, and configuration
 """
 
+import functools
+from dataclasses import dataclass
+
+import numpy as np
+
 # Ticker mapping for correct yfinance symbols (handles crypto and special cases)
 TICKER_MAPPING = {
     "BTC": "BTC-USD",
@@ -38,44 +43,98 @@ userdata = [
     {"layout": "1", "order": "HtoLrisk or LtoHrisk"}
 ]
 
+@dataclass(eq=False)
+class Portfolio:
+    """
+    Column-oriented (structure-of-arrays) view of a portfolio for vectorized math.
+    The app keeps the list of dicts as its source of truth; build one of these per calculation.
+    """
+    tickers: list
+    symbols: list  # normalized yfinance tickers, rebuilt per from_dicts call (normalize_ticker is memoized)
+    quantity: np.ndarray
+    buy_price: np.ndarray
+    current_price: np.ndarray
+
+    @classmethod
+    def from_dicts(cls, assets):
+        """Build from a list of asset dicts"""
+        n = len(assets)
+        tickers = [a.get("ticker", "") for a in assets]
+        return cls(
+            tickers=tickers,
+            symbols=[normalize_ticker(t) for t in tickers],
+            quantity=np.fromiter((a.get("quantity", 0) for a in assets), float, count=n),
+            buy_price=np.fromiter((a.get("buy_price", 0) for a in assets), float, count=n),
+            current_price=np.fromiter((a.get("current_price", 0) for a in assets), float, count=n),
+        )
+
+
 # ANSI color codes for terminal formatting
+# Module-level constants so hot paths can import them directly
+# Basic colors
+RED = '\033[91m'
+GREEN = '\033[92m'
+YELLOW = '\033[93m'
+BLUE = '\033[94m'
+MAGENTA = '\033[95m'
+CYAN = '\033[96m'
+WHITE = '\033[97m'
+
+# Styles
+BOLD = '\033[1m'
+UNDERLINE = '\033[4m'
+ITALIC = '\033[3m'
+
+# Background colors
+BG_BLACK = '\033[40m'
+BG_RED = '\033[41m'
+BG_GREEN = '\033[42m'
+BG_BLUE = '\033[44m'
+
+# Reset
+RESET = '\033[0m'
+
+# Combinations (pre-made for convenience)
+SUCCESS = BOLD + GREEN   # Bold Green
+ERROR = BOLD + RED       # Bold Red
+WARNING = BOLD + YELLOW  # Bold Yellow
+INFO = BOLD + CYAN       # Bold Cyan
+HEADER = BOLD + MAGENTA  # Bold Magenta
+
+
 class Colors:
-    """ANSI color codes for terminal formatting"""
-    # Basic colors
-    RED = '\033[91m'
-    GREEN = '\033[92m'
-    YELLOW = '\033[93m'
-    BLUE = '\033[94m'
-    MAGENTA = '\033[95m'
-    CYAN = '\033[96m'
-    WHITE = '\033[97m'
+    """ANSI color codes for terminal formatting (namespace over the constants above)"""
+    RED = RED
+    GREEN = GREEN
+    YELLOW = YELLOW
+    BLUE = BLUE
+    MAGENTA = MAGENTA
+    CYAN = CYAN
+    WHITE = WHITE
     
-    # Styles
-    BOLD = '\033[1m'
-    UNDERLINE = '\033[4m'
-    ITALIC = '\033[3m'
+    BOLD = BOLD
+    UNDERLINE = UNDERLINE
+    ITALIC = ITALIC
     
-    # Background colors
-    BG_BLACK = '\033[40m'
-    BG_RED = '\033[41m'
-    BG_GREEN = '\033[42m'
-    BG_BLUE = '\033[44m'
+    BG_BLACK = BG_BLACK
+    BG_RED = BG_RED
+    BG_GREEN = BG_GREEN
+    BG_BLUE = BG_BLUE
     
-    # Reset
-    RESET = '\033[0m'
+    RESET = RESET
     
-    # Combinations (pre-made for convenience)
-    SUCCESS = '\033[1m\033[92m'  # Bold Green
-    ERROR = '\033[1m\033[91m'    # Bold Red
-    WARNING = '\033[1m\033[93m'  # Bold Yellow
-    INFO = '\033[1m\033[96m'     # Bold Cyan
-    HEADER = '\033[1m\033[95m'   # Bold Magenta
+    SUCCESS = SUCCESS
+    ERROR = ERROR
+    WARNING = WARNING
+    INFO = INFO
+    HEADER = HEADER
 
 
+@functools.lru_cache(maxsize=4096)
 def normalize_ticker(ticker):
     """
     Normalize ticker symbol for yfinance.
     Maps common symbols to their correct yfinance equivalents.
     """
-    ticker = ticker.upper().strip()
+    ticker = ticker.strip().upper()
     return TICKER_MAPPING.get(ticker, ticker)
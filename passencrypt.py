@@ -1,21 +1,38 @@
 # ---- Begin secure storage helpers ----
 import os
+import errno
 import stat
+import functools
 import json
 import base64
+from cryptography.exceptions import InvalidTag
 from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import constant_time
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 import keyring   # cross-platform OS key store
 
+try:
+    import orjson   # optional: faster JSON that encodes straight to bytes
+except ImportError:
+    orjson = None
+
 # CONFIG
 APP_NAME = "portt_app"              # arbitrary app name for keyring
 KEYRING_KEY_ID = f"{APP_NAME}_master_key"
 KEYFILE_PATH = os.path.expanduser("~/.portt_master.key")  # default location
 ENCRYPTED_STATE = os.path.expanduser("~/.portt_state.enc")  # encrypted data file
+NONCE_SIZE = 12                      # AES-GCM nonce length, stored in front of the ciphertext
+# errnos meaning the kernel or filesystem has no O_TMPFILE support
+NO_TMPFILE_ERRNOS = {errno.EISDIR, errno.EOPNOTSUPP, errno.EINVAL}
+
+# generate a fresh 256-bit AES-GCM key (raw bytes)
+def generate_master_key():
+    return os.urandom(32)
 
-# generate a fresh Fernet key
-def generate_fernet_key():
-    return Fernet.generate_key()  # already urlsafe base64 bytes
+# AES key for a master key; older installs hold a Fernet key (urlsafe base64 of 32 bytes)
+def aes_key_from_master(key: bytes):
+    if len(key) == 32:
+        return key
+    return base64.urlsafe_b64decode(key)
 
 # save key into OS keyring (preferred)
 def save_key_to_keyring(key: bytes):
@@ -32,8 +49,46 @@ def load_key_from_keyring():
         pass
     return None
 
+# Linux: write the key into an unnamed 0600 file (O_TMPFILE), fsync, then publish it.
+# The file never exists under a name with default perms, so no chmod is needed.
+def save_key_to_tmpfile(key: bytes, path=KEYFILE_PATH):
+    dirname = os.path.dirname(path) or "."
+    fd = os.open(dirname, os.O_TMPFILE | os.O_WRONLY, 0o600)
+    try:
+        view = memoryview(key)
+        while view:
+            view = view[os.write(fd, view):]
+        os.fsync(fd)
+        dfd = os.open(dirname, os.O_RDONLY)
+        try:
+            # linkat cannot overwrite, so link next to the target and rename over it
+            tmp = path + ".tmp"
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            # passing a dir fd makes os.link use linkat(AT_SYMLINK_FOLLOW), which
+            # resolves the /proc fd symlink to the unnamed file
+            os.link(f"/proc/self/fd/{fd}", tmp, src_dir_fd=dfd)
+            os.replace(tmp, path)
+            os.fsync(dfd)
+        finally:
+            os.close(dfd)
+    finally:
+        os.close(fd)
+
 # save key to local keyfile with strict perms
 def save_key_to_keyfile(key: bytes, path=KEYFILE_PATH):
+    try:
+        save_key_to_tmpfile(key, path)
+        return
+    except AttributeError:
+        pass  # no os.O_TMPFILE (non-Linux): fall back below
+    except OSError as e:
+        if e.errno not in NO_TMPFILE_ERRNOS:
+            raise
+        # filesystem without O_TMPFILE support: fall back below
+
     # write atomically
     tmp = path + ".tmp"
     with open(tmp, "wb") as f:
@@ -76,7 +131,7 @@ def ensure_master_key():
         return key
 
     # 3) None found: generate new, save to keyring if possible, otherwise to keyfile
-    key = generate_fernet_key()
+    key = generate_master_key()
     try:
         save_key_to_keyring(key)
     except Exception:
@@ -84,43 +139,71 @@ def ensure_master_key():
         save_key_to_keyfile(key)
     return key
 
-# encrypt / decrypt wrappers using Fernet and the master key
-def encrypt_state(obj: dict, key: bytes, filename=ENCRYPTED_STATE):
-    f = Fernet(key)
-    plaintext = json.dumps(obj, ensure_ascii=False).encode("utf-8")
-    token = f.encrypt(plaintext)
+# JSON <-> UTF-8 bytes, via orjson when installed
+def dumps_state(obj: dict):
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+def loads_state(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data.decode("utf-8"))
+
+# encrypt / decrypt wrappers using a prebuilt AES-GCM cipher (built once from the master key)
+def encrypt_state(obj: dict, aes: AESGCM, filename=ENCRYPTED_STATE):
+    plaintext = dumps_state(obj)
+    nonce = os.urandom(NONCE_SIZE)
+    token = aes.encrypt(nonce, plaintext, None)
     with open(filename, "wb") as fh:
-        fh.write(token)
+        fh.write(nonce + token)
     # ensure file perms
     try:
         os.chmod(filename, 0o600)
     except Exception:
         pass
 
-def decrypt_state(key: bytes, filename=ENCRYPTED_STATE):
+# legacy: Fernet for state files written before the switch to AES-GCM (re-saved as AES-GCM)
+def decrypt_state(aes: AESGCM, filename=ENCRYPTED_STATE, legacy: Fernet = None):
     if not os.path.exists(filename):
         return None
     with open(filename, "rb") as fh:
-        token = fh.read()
-    f = Fernet(key)
-    plaintext = f.decrypt(token)
-    return json.loads(plaintext.decode("utf-8"))
+        blob = fh.read()
+    try:
+        plaintext = aes.decrypt(blob[:NONCE_SIZE], blob[NONCE_SIZE:], None)
+    except (InvalidTag, ValueError):
+        if legacy is None:
+            raise
+        plaintext = legacy.decrypt(blob)
+    return loads_state(plaintext)
 
 # Provide a simple public API for the main app to use
-MASTER_KEY = ensure_master_key()   # bytes
+# the key is resolved on first use, so importing this module never touches the keyring
+@functools.lru_cache(maxsize=1)
+def get_master_key():
+    return ensure_master_key()   # bytes
+
+# (AES-GCM cipher, legacy Fernet or None), built once and reused for every save/load
+@functools.lru_cache(maxsize=1)
+def get_ciphers():
+    key = get_master_key()
+    legacy = Fernet(key) if len(key) != 32 else None
+    return AESGCM(aes_key_from_master(key)), legacy
 
 def save_state(obj: dict, filename=ENCRYPTED_STATE):
     """
     Save the provided dict into the encrypted state file using the master key.
     """
-    encrypt_state(obj, MASTER_KEY, filename)
+    aes, _ = get_ciphers()
+    encrypt_state(obj, aes, filename)
 
 def load_state(filename=ENCRYPTED_STATE):
     """
     Load and return the decrypted state dict or None if not present.
     """
     try:
-        return decrypt_state(MASTER_KEY, filename)
+        aes, legacy = get_ciphers()
+        return decrypt_state(aes, filename, legacy)
     except Exception:
         return None
 # ---- End secure storage helpers ----
@@ -2,14 +2,16 @@
 
 import json
 import csv
-import statistics
+import re
+import time
+import warnings
 from models import (
     portfolio, transactions, userdata, Colors, normalize_ticker
 )
 from computations import (
     update_all_current_prices, recalculate_portfolio, get_portfolio_claim,
-    percent_return, market_value, unrealized_pl, volatility, classify_risk,
-    get_live_price, fmt_money
+    market_value, volatility, classify_risk, get_live_price, fmt_money,
+    summarize_returns
 )
 from visualization import (
     display_portfolio_table, display_transactions_table, display_navigation_menu,
@@ -17,6 +19,19 @@ from visualization import (
     chart_volatility, chart_pnl, chart_price_history
 )
 
+try:
+    import orjson   # optional: faster JSON encode/decode for save_state/load_state
+except ImportError:
+    orjson = None
+
+try:
+    import pandas as pd   # optional: C-parsed CSV imports; csv.DictReader is the fallback
+except ImportError:
+    pd = None
+
+# Errors raised for malformed CSV files by whichever reader is in use
+CSV_PARSE_ERRORS = (csv.Error,) + ((pd.errors.ParserError,) if pd is not None else ())
+
 try:
     from passencrypt import save_state as save_encrypted_state, load_state as load_encrypted_state
 except ImportError:
@@ -28,6 +43,49 @@ except ImportError:
 creds = userdata[0]
 preferences = userdata[1]
 portfolio_metrics = {}
+_metrics_dirty = True  # set whenever portfolio data changes; cleared by refresh_portfolio_metrics
+_ticker_index = {}  # ticker -> asset dict in portfolio, for O(1) lookups
+
+# Live prices fetched less than this many seconds ago are reused (stored in preferences)
+PRICE_REFRESH_SECONDS = 300
+
+# Characters counted as "special" by check_password
+_SPECIAL_CHARS = frozenset("!@#$%^&*()_+-=[]{}|;:',.<>?/")
+
+# Common weak patterns rejected by check_password, matched case-insensitively
+_WEAK_RE = re.compile(r"123|abc|password|qwerty|admin", re.IGNORECASE)
+
+# Write buffer for CSV exports, so rows reach the OS in a few large writes
+CSV_WRITE_BUFFER = 1 << 20
+
+# Accepted column names for each numeric portfolio field, in priority order
+QUANTITY_COLUMNS = ("quantity", "qty", "shares", "amount", "units")
+BUY_PRICE_COLUMNS = ("buy_price", "buyprice", "buy", "price", "cost")
+CURRENT_PRICE_COLUMNS = ("current_price", "currentprice", "current", "close", "last")
+
+
+def rebuild_ticker_index():
+    """Rebuild the ticker index after the portfolio list is replaced"""
+    _ticker_index.clear()
+    for asset in portfolio:
+        _ticker_index.setdefault(asset["ticker"], asset)  # first match wins, like a scan
+
+
+rebuild_ticker_index()
+
+
+def dumps_json(data):
+    """Serialize state to indented UTF-8 JSON bytes (orjson when available)"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def loads_json(buf):
+    """Parse UTF-8 JSON bytes (orjson when available)"""
+    if orjson is not None:
+        return orjson.loads(buf)
+    return json.loads(buf.decode("utf-8"))
 
 
 def save_state_encrypted():
@@ -57,8 +115,10 @@ def save_state(filename="userdata.json"):
         "userdata": userdata
     }
     try:
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        # Encode first, then hand the whole payload to the OS in one write
+        payload = dumps_json(data)
+        with open(filename, "wb") as f:
+            f.write(payload)
         print(f"💾 State saved to {filename}")
     except Exception as e:
         print(f"❌ Failed to save state: {e}")
@@ -69,26 +129,56 @@ def load_state(filename="userdata.json"):
     global portfolio, transactions, userdata, creds, preferences, portfolio_metrics
     
     try:
-        with open(filename, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with open(filename, "rb") as f:
+            data = loads_json(f.read())
         
         portfolio[:] = data.get("portfolio", portfolio)
         transactions[:] = data.get("transactions", transactions)
         userdata[:] = data.get("userdata", userdata)
         creds = userdata[0]
         preferences = userdata[1]
+        rebuild_ticker_index()
         
         print("🔄 Previous session loaded.")
+        invalidate_metrics()
         refresh_portfolio_metrics()
     
     except FileNotFoundError:
         print("⚠️  No saved session found. Starting fresh.")
 
 
+def invalidate_metrics():
+    """Mark portfolio metrics as stale after the portfolio or prices change"""
+    global _metrics_dirty
+    _metrics_dirty = True
+
+
+def prices_are_stale():
+    """True if live prices were never fetched or are older than PRICE_REFRESH_SECONDS"""
+    return time.time() - preferences.get("last_price_ts", 0) > PRICE_REFRESH_SECONDS
+
+
+def refresh_prices():
+    """Fetch live prices, record when any arrived, and invalidate metrics if anything moved"""
+    changed, fetched = update_all_current_prices(portfolio)
+    if changed:
+        invalidate_metrics()
+    if fetched:  # an all-failed (offline) refresh leaves the prices stale so the next view retries
+        preferences["last_price_ts"] = time.time()
+
+
+def expire_prices():
+    """Force the next view to refetch live prices (the set of assets changed)"""
+    preferences.pop("last_price_ts", None)
+
+
 def refresh_portfolio_metrics():
-    """Refresh portfolio metrics"""
-    global portfolio_metrics
+    """Refresh portfolio metrics (no-op if nothing changed since the last refresh)"""
+    global portfolio_metrics, _metrics_dirty
+    if not _metrics_dirty:
+        return
     portfolio_metrics = recalculate_portfolio(portfolio, preferences)
+    _metrics_dirty = False
 
 
 def print_header(text):
@@ -111,24 +201,25 @@ def ouinput(prompt="> "):
     Global commands: /home, /menu, /exit, /info
     Returns None if global command was used (caller should handle)
     """
-    text = input(prompt).strip()
-    
-    # GLOBAL COMMANDS
-    if text == "/home":
-        home_page()
-        return None
-    elif text == "/menu":
-        main_menu()
-        return None
-    elif text == "/exit":
-        print("👋 Goodbye!")
-        save_state_encrypted()
-        exit()
-    elif text == "/info" or text == "/help":
-        print("Available commands: /home, /menu, /exit, /info, /help")
-        return ouinput(prompt)
-    else:
-        return text
+    while True:
+        text = input(prompt).strip()
+        
+        # GLOBAL COMMANDS
+        if text == "/home":
+            home_page()
+            return None
+        elif text == "/menu":
+            main_menu()
+            return None
+        elif text == "/exit":
+            print("👋 Goodbye!")
+            save_state_encrypted()
+            exit()
+        elif text == "/info" or text == "/help":
+            print("Available commands: /home, /menu, /exit, /info, /help")
+            continue  # ask again
+        else:
+            return text
 
 
 def get_float(prompt):
@@ -152,12 +243,14 @@ def check_password(password):
     has_lower = False
     has_digit = False
     has_special = False
-    special_chars = "!@#$%^&*()_+-=[]{}|;:',.<>?/"
     
     if len(password) < 8:
         print(" Password needs at least 8 characters")
         return False
     
+    # Single pass: character classes plus the first run of 3 identical characters
+    repetition = None
+    prev1 = prev2 = None
     for char in password:
         if char.isupper():
             has_upper = True
@@ -165,26 +258,23 @@ def check_password(password):
             has_lower = True
         elif char.isdigit():
             has_digit = True
-        elif char in special_chars:
+        elif char in _SPECIAL_CHARS:
             has_special = True
+        
+        if repetition is None and char == prev1 == prev2:
+            repetition = char * 3
+        prev2, prev1 = prev1, char
     
     # Check for repetitive characters
-    has_repetition = False
-    for i in range(len(password) - 2):
-        if password[i] == password[i+1] == password[i+2]:
-            print(f"Such repetition is forbidden '{password[i:i+3]}'")
-            has_repetition = True
-            break
+    has_repetition = repetition is not None
+    if has_repetition:
+        print(f"Such repetition is forbidden '{repetition}'")
     
     # Check for common weak patterns
-    weak_patterns = ["123", "abc", "password", "qwerty", "admin"]
-    has_weak = False
-    password_lower = password.lower()
-    for pattern in weak_patterns:
-        if pattern in password_lower:
-            print(f"⚠️  Warning: Contains weak pattern '{pattern}'")
-            has_weak = True
-            break
+    weak = _WEAK_RE.search(password)
+    has_weak = weak is not None
+    if has_weak:
+        print(f"⚠️  Warning: Contains weak pattern '{weak.group(0).lower()}'")
     
     # Report results
     checks_passed = 0
@@ -226,20 +316,22 @@ def check_password(password):
 
 def home_page():
     """Setup home page with user credentials"""
-    print("\n" + "="*60)
-    print(" Welcome to the Ultimate Portfolio Tracking Tool!")
-    print("="*60)
-    
-    username = ouinput("Input your nickname: ")
-    if username is None:
-        return
-    
-    if len(username) >= 8:
-        print("⚠️  Make it shorter (max 7 characters)")
-        return home_page()
-    else:
+    while True:
+        print("\n" + "="*60)
+        print(" Welcome to the Ultimate Portfolio Tracking Tool!")
+        print("="*60)
+        
+        username = ouinput("Input your nickname: ")
+        if username is None:
+            return
+        
+        if len(username) >= 8:
+            print("⚠️  Make it shorter (max 7 characters)")
+            continue  # ask again
+        
         userdata[0]["nick"] = username
         print(f"Hello, {username}! 👋")
+        break
     
     while True:
         password = ouinput("\nSecure your account with a strong password: ")
@@ -320,11 +412,7 @@ def make_transaction():
     transactions.append(new_trans)
     
     # Update portfolio
-    existing_asset = None
-    for asset in portfolio:
-        if asset["ticker"] == ticker:
-            existing_asset = asset
-            break
+    existing_asset = _ticker_index.get(ticker)
     
     if existing_asset:
         # Update existing asset
@@ -337,16 +425,21 @@ def make_transaction():
             existing_asset["quantity"] -= quantity
             if existing_asset["quantity"] <= 0:
                 portfolio.remove(existing_asset)
+                rebuild_ticker_index()  # another asset may still hold this ticker
     else:
         # Add new asset
-        portfolio.append({
+        new_asset = {
             "ticker": ticker,
             "quantity": quantity,
             "buy_price": price,
             "current_price": price,
             "risk": "OPTIMAL"
-        })
+        }
+        portfolio.append(new_asset)
+        _ticker_index[ticker] = new_asset
+        expire_prices()
     
+    invalidate_metrics()
     refresh_portfolio_metrics()
     print(f"{Colors.SUCCESS}✓ Transaction confirmed and added!{Colors.RESET}")
     return True
@@ -354,7 +447,8 @@ def make_transaction():
 
 def port_perf():
     """Display portfolio performance"""
-    update_all_current_prices(portfolio)
+    if prices_are_stale():
+        refresh_prices()
     refresh_portfolio_metrics()
     
     perf_rep = ouinput("To see the current performance report type X: ")
@@ -384,22 +478,30 @@ def monthly_recap():
         print("⚠️  No transactions yet.")
         return
     
-    buy_transactions = [t for t in transactions if t["type"] == "buy"]
-    if not buy_transactions:
+    # One pass: bucket buy transactions by month while tracking the latest date
+    buys_by_month = {}
+    latest_date = ""
+    for t in transactions:
+        if t["type"] != "buy":
+            continue
+        buys_by_month.setdefault(t["date"][0:7], []).append(t)
+        if t["date"] > latest_date:
+            latest_date = t["date"]
+    
+    if not buys_by_month:
         print("⚠️  No buy transactions yet.")
         return
     
-    latest_date = max(t["date"] for t in buy_transactions)
     latest_month = latest_date[0:7]
-    ventures = [t for t in buy_transactions if t["date"][0:7] == latest_month]
+    ventures = buys_by_month[latest_month]
     
     print(f" ---- Monthly summary ({latest_month}) ----")
     print(f"Amount of ventures: {len(ventures)}")
     
-    total_growth = sum(unrealized_pl(asset) for asset in portfolio)
+    # Fused P&L sum and mean return (one compiled pass when numba is installed)
+    total_growth, avg_return = summarize_returns(portfolio)
     print(f"Your networth has grown by ${total_growth:,.2f}")
     
-    avg_return = statistics.mean(percent_return(asset) for asset in portfolio) if portfolio else 0
     print(f"Growth anticipated next month: {avg_return:.2f}%")
     
     claim = get_portfolio_claim(ventures, portfolio)
@@ -412,10 +514,10 @@ def export_portfolio_csv(filename="portfolio_export.csv"):
     keys = ["ticker", "quantity", "buy_price", "current_price", "risk", "status"]
     
     try:
-        with open(filename, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=keys)
-            writer.writeheader()
-            writer.writerows(portfolio)
+        with open(filename, "w", newline="", encoding="utf-8", buffering=CSV_WRITE_BUFFER) as f:
+            writer = csv.writer(f)
+            writer.writerow(keys)
+            writer.writerows([asset.get(k, "") for k in keys] for asset in portfolio)
         print(f"📁 Portfolio exported to {filename}")
     except Exception as e:
         print(f"❌ Error exporting portfolio: {e}")
@@ -426,70 +528,190 @@ def export_transactions_csv(filename="transactions_export.csv"):
     keys = ["date", "ticker", "type", "quantity", "price"]
     
     try:
-        with open(filename, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=keys)
-            writer.writeheader()
-            writer.writerows(transactions)
+        with open(filename, "w", newline="", encoding="utf-8", buffering=CSV_WRITE_BUFFER) as f:
+            writer = csv.writer(f)
+            writer.writerow(keys)
+            writer.writerows([t.get(k, "") for k in keys] for t in transactions)
         print(f"📁 Transactions exported to {filename}")
     except Exception as e:
         print(f"❌ Error exporting transactions: {e}")
 
 
+def _float_or_nan(raw):
+    """float() with the same $ / thousands-separator cleanup as parse_float; NaN if it still fails"""
+    try:
+        return float(raw)
+    except ValueError:
+        try:
+            return float(raw.replace(",", "").replace("$", "").strip())
+        except ValueError:
+            return float("nan")
+
+
+def _numeric_column(df, candidates, default=0.0):
+    """Per row, the first candidate column that parses as a number (vectorized parse_float)"""
+    result = pd.Series(float("nan"), index=df.index, dtype=float)
+    for key in candidates:
+        if key not in df.columns:
+            continue
+        raw = df[key]
+        cleaned = raw.str.replace(",", "", regex=False).str.replace("$", "", regex=False).str.strip()
+        parsed = pd.to_numeric(cleaned, errors="coerce")
+        # float() accepts a few spellings to_numeric rejects (e.g. "1_000"); retry just those cells
+        retry = parsed.isna() & (raw != "")
+        if retry.any():
+            parsed[retry] = raw[retry].map(_float_or_nan)
+        result = result.fillna(parsed)
+    return result.fillna(default)
+
+
+def _csv_header(filename):
+    """First non-blank row of a CSV file, as csv.reader parses it ([] if there is none)"""
+    with open(filename, "r", encoding="utf-8", newline="") as f:
+        for row in csv.reader(f):
+            if row:
+                return row
+    return []
+
+
+def _use_pandas_reader(filename):
+    """
+    True if pandas can parse this file like DictReader would
+    With duplicate header names pandas keeps the first column and DictReader the last,
+    so such files go through DictReader instead
+    """
+    if pd is None:
+        return False
+    header = _csv_header(filename)
+    return len(set(header)) == len(header)
+
+
+def _read_csv_frame(filename):
+    """All-string read_csv; rows with extra fields are truncated silently, as DictReader does not warn"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", pd.errors.ParserWarning)
+        return pd.read_csv(filename, dtype=str, keep_default_na=False, index_col=False, encoding="utf-8")
+
+
+def _read_portfolio_frame(filename):
+    """Parse a portfolio CSV with pandas; returns None when there is no header row"""
+    try:
+        df = _read_csv_frame(filename)
+    except pd.errors.EmptyDataError:
+        return None
+    df = df.fillna("")
+    
+    qty = _numeric_column(df, QUANTITY_COLUMNS).tolist()
+    buy = _numeric_column(df, BUY_PRICE_COLUMNS).tolist()
+    cur = _numeric_column(df, CURRENT_PRICE_COLUMNS).tolist()
+    
+    ticker_col = pd.Series("", index=df.index, dtype=str)
+    for key in ("symbol", "ticker"):  # ticker wins over symbol when both are set
+        if key in df.columns:
+            ticker_col = df[key].where(df[key] != "", ticker_col)
+    tickers = ticker_col.str.strip().str.upper().tolist()
+    risks = (df["risk"] if "risk" in df.columns else pd.Series("OPTIMAL", index=df.index)).tolist()
+    statuses = (df["status"] if "status" in df.columns else pd.Series("", index=df.index)).tolist()
+    
+    rows = []
+    for i, ticker in enumerate(tickers):
+        if ticker == "":
+            print(f"⚠️  Skipping row without ticker: {df.iloc[i].to_dict()}")
+            continue
+        rows.append({
+            "ticker": ticker,
+            "quantity": qty[i],
+            "buy_price": buy[i],
+            "current_price": cur[i],
+            "risk": risks[i],
+            "status": statuses[i]
+        })
+    return rows
+
+
+def _read_transactions_frame(filename):
+    """Parse a transactions CSV with pandas; an empty file gives no rows"""
+    try:
+        df = _read_csv_frame(filename)
+    except pd.errors.EmptyDataError:
+        return []
+    df["quantity"] = df["quantity"].astype(float)
+    df["price"] = df["price"].astype(float)
+    return df.to_dict(orient="records")
+
+
+def _read_portfolio_rows(filename):
+    """Parse a portfolio CSV with csv.DictReader; returns None when there is no header row"""
+    new_portfolio = []
+    with open(filename, "r", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        if not reader.fieldnames:
+            return None
+        
+        def parse_float(row, candidates, default=0.0):
+            for key in candidates:
+                if key in row and row[key] != "":
+                    try:
+                        return float(row[key])
+                    except ValueError:
+                        try:
+                            cleaned = row[key].replace(",", "").replace("$", "").strip()
+                            return float(cleaned)
+                        except Exception:
+                            continue
+            return default
+        
+        for row in reader:
+            qty = parse_float(row, QUANTITY_COLUMNS)
+            buy = parse_float(row, BUY_PRICE_COLUMNS)
+            cur = parse_float(row, CURRENT_PRICE_COLUMNS)
+            ticker = (row.get("ticker") or row.get("symbol") or "").strip().upper()
+            
+            if ticker == "":
+                print(f"⚠️  Skipping row without ticker: {row}")
+                continue
+            
+            new_portfolio.append({
+                "ticker": ticker,
+                "quantity": qty,
+                "buy_price": buy,
+                "current_price": cur,
+                "risk": row.get("risk", "OPTIMAL"),
+                "status": row.get("status", "")
+            })
+    return new_portfolio
+
+
 def import_portfolio_csv(filename="portfolio_import.csv"):
     """Import portfolio from CSV"""
     global portfolio
     
     try:
-        new_portfolio = []
-        with open(filename, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            if not reader.fieldnames:
-                print(f"❌ '{filename}' has no header row.")
-                return
-            
-            def parse_float(row, candidates, default=0.0):
-                for key in candidates:
-                    if key in row and row[key] != "":
-                        try:
-                            return float(row[key])
-                        except ValueError:
-                            try:
-                                cleaned = row[key].replace(",", "").replace("$", "").strip()
-                                return float(cleaned)
-                            except Exception:
-                                continue
-                return default
-            
-            for row in reader:
-                qty = parse_float(row, ["quantity", "qty", "shares", "amount", "units"])
-                buy = parse_float(row, ["buy_price", "buyprice", "buy", "price", "cost"])
-                cur = parse_float(row, ["current_price", "currentprice", "current", "close", "last"])
-                ticker = (row.get("ticker") or row.get("symbol") or "").strip().upper()
-                
-                if ticker == "":
-                    print(f"⚠️  Skipping row without ticker: {row}")
-                    continue
-                
-                new_portfolio.append({
-                    "ticker": ticker,
-                    "quantity": qty,
-                    "buy_price": buy,
-                    "current_price": cur,
-                    "risk": row.get("risk", "OPTIMAL"),
-                    "status": row.get("status", "")
-                })
+        if _use_pandas_reader(filename):
+            new_portfolio = _read_portfolio_frame(filename)
+        else:
+            new_portfolio = _read_portfolio_rows(filename)
+        
+        if new_portfolio is None:
+            print(f"❌ '{filename}' has no header row.")
+            return
         
         if not new_portfolio:
             print(f"⚠️  No valid portfolio rows found in '{filename}'.")
             return
         
         portfolio[:] = new_portfolio
+        rebuild_ticker_index()
+        expire_prices()
+        invalidate_metrics()
         refresh_portfolio_metrics()
         print(f"📥 Portfolio imported from {filename}")
     
     except FileNotFoundError:
         print(f"❌ File '{filename}' not found.")
         print("👉 Make sure the file is in the same folder as your script.")
+    except CSV_PARSE_ERRORS as e:
+        print(f"❌ Could not parse '{filename}': {e}")
 
 
 def import_transactions_csv(filename="transactions_import.csv"):
@@ -497,20 +719,26 @@ def import_transactions_csv(filename="transactions_import.csv"):
     global transactions
     
     try:
-        new_tx = []
-        with open(filename, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                row["quantity"] = float(row["quantity"])
-                row["price"] = float(row["price"])
-                new_tx.append(row)
+        if _use_pandas_reader(filename):
+            new_tx = _read_transactions_frame(filename)
+        else:
+            new_tx = []
+            with open(filename, "r", encoding="utf-8") as f:
+                reader = csv.DictReader(f)
+                for row in reader:
+                    row["quantity"] = float(row["quantity"])
+                    row["price"] = float(row["price"])
+                    new_tx.append(row)
         
         transactions[:] = new_tx
+        invalidate_metrics()
         print(f"📥 Transactions imported from {filename}")
     
     except FileNotFoundError:
         print(f"❌ File '{filename}' not found.")
         print("👉 Make sure the file is in the same folder as your script.")
+    except CSV_PARSE_ERRORS as e:
+        print(f"❌ Could not parse '{filename}': {e}")
 
 
 def charts():
@@ -625,7 +853,9 @@ if __name__ == "__main__":
                     userdata[:] = loaded.get("userdata", userdata)
                     creds = userdata[0]
                     preferences = userdata[1]
+                    rebuild_ticker_index()
                     print("🔄 Encrypted session loaded.")
+                    invalidate_metrics()
                     refresh_portfolio_metrics()
                 else:
                     load_state()
@@ -637,9 +867,12 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"⚠️  Error during load: {e}")
     
-    # Fetch live prices on startup
-    print("\n⏳ Fetching live prices...")
-    update_all_current_prices(portfolio)
+    # Fetch live prices on startup, unless the loaded session's prices are still fresh
+    if prices_are_stale():
+        print("\n⏳ Fetching live prices...")
+        refresh_prices()
+    else:
+        print(f"\n✓ Using prices from the last session (under {PRICE_REFRESH_SECONDS // 60} minutes old).")
     refresh_portfolio_metrics()
     
     # Start app
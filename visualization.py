@@ -2,11 +2,12 @@
 visualization.py - Data visualization and display functions
 """
 
-import yfinance as yf
-import matplotlib.pyplot as plt
+import numpy as np
 from tabulate import tabulate
-from models import normalize_ticker
-from computations import market_value, unrealized_pl, percent_return, fmt_money
+from models import normalize_ticker, Portfolio
+from computations import (
+    market_value, fmt_money, fetch_history, market_values, unrealized_pls, percent_returns
+)
 
 
 def display_portfolio_table(portfolio_list, preferences=None):
@@ -14,17 +15,19 @@ def display_portfolio_table(portfolio_list, preferences=None):
     headers = ["Ticker", "Qty", "Buy price", "Current price", "Market value", "Unreal. P&L", "Return %", "Risk", "Status"]
     rows = []
     
-    for asset in portfolio_list:
-        mv = market_value(asset)
-        pl = unrealized_pl(asset)
-        ret = percent_return(asset)
+    # Compute the metric columns for all rows at once
+    pf = Portfolio.from_dicts(portfolio_list)
+    metrics = zip(market_values(pf), unrealized_pls(pf), percent_returns(pf))
+    _fm = fmt_money  # local binding for the per-cell calls below
+    
+    for asset, (mv, pl, ret) in zip(portfolio_list, metrics):
         rows.append([
             asset.get("ticker", ""),
-            fmt_money(asset.get("quantity", 0)),
-            fmt_money(asset.get("buy_price", 0)),
-            fmt_money(asset.get("current_price", 0)),
-            fmt_money(mv),
-            fmt_money(pl),
+            _fm(asset.get("quantity", 0)),
+            _fm(asset.get("buy_price", 0)),
+            _fm(asset.get("current_price", 0)),
+            _fm(mv),
+            _fm(pl),
             f"{ret:.2f}%",
             asset.get("risk", "N/A"),
             asset.get("status", "")
@@ -79,6 +82,8 @@ def display_best_and_worst(best, worst):
 
 def chart_allocation(portfolio_list):
     """Display portfolio allocation as pie chart"""
+    import matplotlib.pyplot as plt  # deferred: only paid when a chart is opened
+    
     labels = [a["ticker"] for a in portfolio_list]
     values = [market_value(a) for a in portfolio_list]
     
@@ -109,25 +114,34 @@ def chart_allocation(portfolio_list):
 
 def chart_volatility(portfolio_list):
     """Display rolling volatility for portfolio assets"""
+    import matplotlib.pyplot as plt
+    
+    assets = portfolio_list[:12]
+    try:
+        histories = fetch_history([a["ticker"] for a in assets], period="6mo")
+    except Exception as e:
+        print(f"⚠️  Could not fetch volatility data: {e}")
+        return
+    
     plt.figure(figsize=(10, 5))
     plotted = 0
     
-    for asset in portfolio_list[:12]:
-        ticker = normalize_ticker(asset["ticker"])
-        try:
-            hist = yf.Ticker(ticker).history(period="6mo")
-            if hist.empty:
-                continue
-            
-            returns = hist["Close"].pct_change().dropna()
-            if returns.empty:
-                continue
-            
-            (returns.rolling(5).std() * (252 ** 0.5)).plot(label=asset["ticker"], alpha=0.8)
-            plotted += 1
-        except Exception as e:
-            print(f"⚠️  Could not fetch data for {ticker}: {e}")
+    for asset in assets:
+        hist = histories.get(normalize_ticker(asset["ticker"]))
+        if hist is None:
             continue
+        
+        closes = hist["Close"].dropna()
+        close = closes.to_numpy(dtype=float)
+        if close.size < 6:  # fewer closes than one full 5-return window
+            continue
+        
+        # Daily returns and their 5-day rolling std straight on the ndarray
+        rets = np.diff(close) / close[:-1]
+        windows = np.lib.stride_tricks.sliding_window_view(rets, 5)
+        vol = windows.std(axis=1, ddof=1) * (252 ** 0.5)
+        plt.plot(closes.index[5:], vol, label=asset["ticker"], alpha=0.8)
+        plotted += 1
     
     if plotted == 0:
         print("⚠️  No volatility data available.")
@@ -143,15 +157,18 @@ def chart_volatility(portfolio_list):
 
 def chart_pnl(portfolio_list):
     """Display unrealized P&L bar chart"""
-    tickers = [a["ticker"] for a in portfolio_list]
-    pnls = [unrealized_pl(a) for a in portfolio_list]
+    import matplotlib.pyplot as plt
+    
+    pf = Portfolio.from_dicts(portfolio_list)
+    tickers = pf.tickers
+    pnls = unrealized_pls(pf)
     
-    if not pnls:
+    if pnls.size == 0:
         print("⚠️  No P&L data to display.")
         return
     
     plt.figure(figsize=(10, 5))
-    colors = ['green' if p > 0 else 'red' for p in pnls]
+    colors = np.where(pnls > 0, 'green', 'red').tolist()
     bars = plt.bar(tickers, pnls, color=colors, alpha=0.7)
     
     plt.title("Unrealized P&L per Asset")
@@ -178,19 +195,22 @@ def chart_pnl(portfolio_list):
 
 def chart_price_history(portfolio_list):
     """Display price history for portfolio assets"""
+    import matplotlib.pyplot as plt
+    
+    try:
+        histories = fetch_history([a["ticker"] for a in portfolio_list], period="3mo")
+    except Exception as e:
+        print(f"⚠️  Could not fetch price history: {e}")
+        return
+    
     plt.figure(figsize=(10, 5))
     
     for asset in portfolio_list:
-        ticker = normalize_ticker(asset["ticker"])
-        try:
-            hist = yf.Ticker(ticker).history(period="3mo")
-            if hist.empty:
-                continue
-            
-            plt.plot(hist.index, hist["Close"], label=asset["ticker"], linewidth=2)
-        except Exception as e:
-            print(f"⚠️  Could not fetch history for {ticker}: {e}")
+        hist = histories.get(normalize_ticker(asset["ticker"]))
+        if hist is None:
             continue
+        
+        plt.plot(hist.index, hist["Close"], label=asset["ticker"], linewidth=2)
     
     plt.title("Price History of Portfolio Assets (3 months)")
     plt.xlabel("Date")